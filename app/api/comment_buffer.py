@@ -0,0 +1,214 @@
+"""
+Write-ahead comment buffer
+
+With settings.COMMENT_BUFFER_ENABLED, POST /comments appends the comment
+to a local log file (fsynced) and answers right away. A background thread
+in each process moves the log into the database with bulk_create, once
+COMMENT_BUFFER_BATCH_SIZE comments were appended or every
+COMMENT_BUFFER_FLUSH_SECONDS.
+
+Files in settings.COMMENT_BUFFER_DIR:
+
+    comments.log              comments being appended
+    comments-<ns>.flushing    logs being flushed, removed once committed
+
+Every comment carries a uuid stored in Comment.buffer_id, so replaying a
+log that was partly flushed before a crash doesn't insert twice. Run the
+flush_comment_buffer command on start to replay what was left.
+"""
+import fcntl
+import glob
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import orjson
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.dateparse import parse_date, parse_datetime
+
+from api.models import Comment, Movie
+from api.trending import record_comments
+
+logger = logging.getLogger(__name__)
+
+_buffers = {}
+
+
+class CommentBuffer:
+    def __init__(self, directory):
+        self.directory = directory
+        self.log_path = os.path.join(directory, 'comments.log')
+        self._appended = 0
+        self._wakeup = threading.Event()
+        self._flusher = None
+
+    @contextmanager
+    def _flock(self, name):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def append(self, comment):
+        """
+        Durably logs a new comment
+        :param comment: unsaved Comment
+        :return: the comment, with its buffer_id set
+        """
+        comment.buffer_id = uuid.uuid4()
+        record = {
+            'buffer_id': str(comment.buffer_id),
+            'comment': comment.comment,
+            'movie': comment.movie_id,
+            'imdbid': comment.movie.imdbid,
+            'added_on': comment.added_on.isoformat(),
+            'added_at': comment.added_at.isoformat(),
+        }
+
+        with self._flock('append.lock'):
+            with open(self.log_path, 'a+b') as f:
+                # End a line torn by a crash, or this record would be
+                # glued onto it and skipped with it
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        f.write(b'\n')
+                f.write(orjson.dumps(record) + b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+        self._appended += 1
+        self.start_flusher()
+        if self._appended >= settings.COMMENT_BUFFER_BATCH_SIZE:
+            self._wakeup.set()
+        return comment
+
+    def _segments(self):
+        return sorted(glob.glob(os.path.join(self.directory,
+                                             'comments-*.flushing')))
+
+    def _read(self, path):
+        """
+        :return: records of a log, skipping a torn last line (a crash or,
+            when reading the live log, an append in progress)
+        """
+        records = []
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    records.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    pass
+        return records
+
+    def _to_comment(self, record):
+        return Comment(buffer_id=record['buffer_id'],
+                       comment=record['comment'],
+                       movie_id=record['movie'],
+                       added_on=parse_date(record['added_on']),
+                       added_at=parse_datetime(record['added_at']))
+
+    def pending(self, movie_id=None):
+        """
+        Comments not flushed yet
+        :param movie_id: only those of this imdb id
+        :return: list of unsaved Comment
+        """
+        paths = self._segments()
+        if os.path.exists(self.log_path):
+            paths.append(self.log_path)
+
+        comments = []
+        for path in paths:
+            try:
+                records = self._read(path)
+            except FileNotFoundError:
+                # Flushed meanwhile
+                continue
+            comments += [self._to_comment(record) for record in records
+                         if not movie_id or record['imdbid'] == movie_id]
+        return comments
+
+    def _insert(self, records):
+        """
+        Inserts records that aren't in the database yet
+        :return: number of comments inserted
+        """
+        buffer_ids = [record['buffer_id'] for record in records]
+        movie_ids = {record['movie'] for record in records}
+
+        with transaction.atomic():
+            flushed = {str(buffer_id) for buffer_id in Comment.objects
+                       .filter(buffer_id__in=buffer_ids)
+                       .values_list('buffer_id', flat=True)}
+            movies = set(Movie.objects.filter(pk__in=movie_ids)
+                         .values_list('pk', flat=True))
+
+            comments = [self._to_comment(record) for record in records
+                        if record['buffer_id'] not in flushed and
+                        record['movie'] in movies]
+            Comment.objects.bulk_create(comments)
+            # bulk_create skips Comment.save()
+            record_comments(comments)
+        return len(comments)
+
+    def flush(self):
+        """
+        Moves every logged comment into the database
+        :return: number of comments inserted
+        """
+        inserted = 0
+        with self._flock('flush.lock'):
+            with self._flock('append.lock'):
+                if os.path.exists(self.log_path):
+                    os.replace(self.log_path, os.path.join(
+                        self.directory,
+                        f'comments-{time.time_ns()}.flushing'))
+                self._appended = 0
+
+            batch_size = settings.COMMENT_BUFFER_BATCH_SIZE
+            for path in self._segments():
+                records = self._read(path)
+                for start in range(0, len(records), batch_size):
+                    inserted += self._insert(
+                        records[start:start + batch_size])
+                os.remove(path)
+        return inserted
+
+    def _run_flusher(self):
+        while True:
+            self._wakeup.wait(settings.COMMENT_BUFFER_FLUSH_SECONDS)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing the comment buffer failed')
+            finally:
+                connection.close()
+
+    def start_flusher(self):
+        """
+        Starts the background flush thread of this process, once
+        """
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._run_flusher,
+                                             daemon=True)
+            self._flusher.start()
+
+
+def get_buffer():
+    """
+    :return: the CommentBuffer in settings.COMMENT_BUFFER_DIR, None when
+        buffering is disabled
+    """
+    if not settings.COMMENT_BUFFER_ENABLED:
+        return None
+
+    directory = settings.COMMENT_BUFFER_DIR
+    if directory not in _buffers:
+        _buffers[directory] = CommentBuffer(directory)
+    return _buffers[directory]
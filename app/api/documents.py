@@ -0,0 +1,62 @@
+import orjson
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from api.models import Movie
+from api.renderers import ORJSONRenderer
+from api.serializers import MovieSerializer
+
+# Bump when render_document output changes (serializer fields, renderer),
+# older documents are then rendered on read until render_movie_documents
+# rewrites them
+DOCUMENT_VERSION = 1
+
+
+def render_document(movie):
+    """
+    Renders a movie the same way GET /movies does
+    :param movie: Movie
+    :return: JSON bytes
+    """
+    return ORJSONRenderer().render(MovieSerializer(movie).data)
+
+
+def get_documents(qs):
+    """
+    Fetches the pre-rendered documents of a movie queryset, keeping its order
+    Documents are written on save. Rows without an up to date one (cleared
+    by QuerySet.update(), or older than DOCUMENT_VERSION) are rendered for
+    this response only, reads never write
+    :param qs: Movie queryset
+    :return: list of JSON bytes
+    """
+    rows = list(qs.values_list('id', 'document', 'document_version'))
+
+    stale = [pk for pk, document, version in rows
+             if not document or version != DOCUMENT_VERSION]
+    rendered = {}
+    if stale:
+        rendered = {movie.pk: render_document(movie)
+                    for movie in Movie.get_all().filter(pk__in=stale)}
+
+    return [rendered.get(pk, document) for pk, document, version in rows]
+
+
+def documents_response(request, documents, many=True):
+    """
+    Builds the response straight from pre-rendered documents
+    JSON is concatenated as is, other formats decode the documents and go
+    through the negotiated renderer
+    :param documents: list of JSON bytes
+    :param many: respond with a list instead of a single movie
+    :return: response
+    """
+    if isinstance(request.accepted_renderer, ORJSONRenderer):
+        if many:
+            content = b'[' + b','.join(documents) + b']'
+        else:
+            content = bytes(documents[0])
+        return HttpResponse(content, content_type='application/json')
+
+    data = [orjson.loads(document) for document in documents]
+    return Response(data if many else data[0])
@@ -0,0 +1,42 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from api.models import Movie
+from api.renderers import MessagePackRenderer, ORJSONRenderer
+from api.serializers import MovieSerializer
+
+
+class Command(BaseCommand):
+    """Django command to compare renderer encode time and payload size"""
+
+    help = 'Benchmark the API renderers on the GET /movies payload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200,
+                            help='Number of renders per renderer')
+        parser.add_argument('--copies', type=int, default=1,
+                            help='Multiply the movie list to simulate a '
+                                 'larger catalogue')
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        repeat = options['repeat']
+        serializer = MovieSerializer(Movie.get_all(), many=True)
+        # Keep the serializer, ORJSONRenderer reads its fields
+        data = ReturnList(list(serializer.data) * options['copies'],
+                          serializer=serializer)
+
+        self.stdout.write(f'Rendering {len(data)} movies {repeat} times')
+        for renderer in (JSONRenderer(), ORJSONRenderer(),
+                         MessagePackRenderer()):
+            payload = renderer.render(data)
+            seconds = timeit.timeit(lambda: renderer.render(data),
+                                    number=repeat)
+            self.stdout.write(
+                f'{type(renderer).__name__:<20} '
+                f'{seconds / repeat * 1000:8.3f} ms/render '
+                f'{len(payload):10d} bytes'
+            )
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare startup time and requests/s of runserver
+    and the gunicorn production setup
+    """
+
+    help = 'Benchmark runserver against gunicorn.conf.py'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--path', default='/movies')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--gunicorn-settings', default='app.settings_api',
+                            help='DJANGO_SETTINGS_MODULE for gunicorn')
+
+    def wait_until_up(self, url, proc, timeout=60):
+        """
+        :return: seconds until the server answered
+        """
+        start = time.perf_counter()
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise CommandError(f'Server exited with {proc.returncode}')
+            try:
+                if requests.get(url, timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.05)
+        raise CommandError(f'Server not up after {timeout}s')
+
+    def load(self, url, total, concurrency):
+        """
+        :return: requests per second
+        """
+        local = threading.local()
+
+        def fetch(_):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            local.session.get(url).raise_for_status()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(fetch, range(total)))
+        return total / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        address = f'127.0.0.1:{options["port"]}'
+        url = f'http://{address}{options["path"]}'
+        servers = {
+            'runserver': (
+                [sys.executable, 'manage.py', 'runserver', '--noreload',
+                 address],
+                os.environ['DJANGO_SETTINGS_MODULE']),
+            'gunicorn': (
+                [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                 '--bind', address, 'app.wsgi'],
+                options['gunicorn_settings']),
+        }
+
+        for name, (command, settings_module) in servers.items():
+            env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+            env.setdefault('ALLOWED_HOSTS', '127.0.0.1')
+            proc = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env,
+                                    stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL)
+            try:
+                startup = self.wait_until_up(url, proc)
+                rate = self.load(url, options['requests'],
+                                 options['concurrency'])
+            finally:
+                proc.terminate()
+                proc.wait()
+
+            self.stdout.write(f'{name:<10} startup {startup:6.2f} s '
+                              f'{rate:10.1f} requests/s')
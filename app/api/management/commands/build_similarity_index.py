@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Movie
+from api.similarity import get_index
+
+
+class Command(BaseCommand):
+    """Django command to rebuild the similar movies index"""
+
+    help = 'Rebuild the similar movies feature matrix from the database'
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        index = get_index()
+        index.rebuild(Movie.get_all())
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {len(index)} movies in {index.path}'))
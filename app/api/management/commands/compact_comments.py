@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from api.models import Comment, CommentCount
+from api.partitions import (add_months, drop_partition, is_partitioned,
+                            list_partitions)
+
+
+class Command(BaseCommand):
+    """
+    Django command to compact comments older than the retention horizon
+    into per movie, per day counts
+    """
+
+    help = 'Roll old comments up into CommentCount and drop them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int,
+                            default=settings.COMMENT_RETENTION_MONTHS,
+                            help='Keep raw comments for this many months')
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        horizon = add_months(timezone.localdate(), -options['months'])
+        self.stdout.write(f'Compacting comments before {horizon}...')
+
+        with transaction.atomic():
+            totals = Comment.objects \
+                .filter(added_on__lt=horizon, movie__isnull=False) \
+                .order_by() \
+                .values('movie', 'added_on') \
+                .annotate(total=Count('id'))
+            totals = list(totals)
+
+            existing = {
+                (count.movie_id, count.added_on): count.pk
+                for count in CommentCount.objects.filter(
+                    added_on__in={row['added_on'] for row in totals})
+            }
+
+            new_counts = []
+            for row in totals:
+                pk = existing.get((row['movie'], row['added_on']))
+                if pk:
+                    CommentCount.objects.filter(pk=pk) \
+                        .update(total=F('total') + row['total'])
+                else:
+                    new_counts.append(CommentCount(movie_id=row['movie'],
+                                                   added_on=row['added_on'],
+                                                   total=row['total']))
+            CommentCount.objects.bulk_create(new_counts)
+
+            # Whole partitions are dropped, leftovers (e.g. rows in the
+            # default partition) are deleted
+            if is_partitioned():
+                for month in list_partitions():
+                    if add_months(month, 1) <= horizon:
+                        drop_partition(month)
+                        self.stdout.write(
+                            f'Dropped partition for {month:%Y-%m}')
+            Comment.objects.filter(added_on__lt=horizon).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Compacted {sum(row["total"] for row in totals)} comments!'))
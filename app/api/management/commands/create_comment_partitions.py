@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.partitions import add_months, create_partition, is_partitioned
+
+
+class Command(BaseCommand):
+    """Django command to create upcoming monthly comment partitions"""
+
+    help = 'Create comment partitions from this month on'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int,
+                            default=settings.COMMENT_PARTITIONS_AHEAD,
+                            help='Number of months after the current one')
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if not is_partitioned():
+            self.stdout.write('Comments table is not partitioned, skipping')
+            return
+
+        this_month = add_months(timezone.localdate(), 0)
+        for months in range(options['months_ahead'] + 1):
+            month = add_months(this_month, months)
+            if create_partition(month):
+                self.stdout.write(f'Created partition for {month:%Y-%m}')
+
+        self.stdout.write(self.style.SUCCESS('Comment partitions ready!'))
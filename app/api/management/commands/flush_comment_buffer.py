@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.comment_buffer import get_buffer
+
+
+class Command(BaseCommand):
+    """Django command to flush the comment buffer, replaying leftover logs"""
+
+    help = 'Move buffered comments into the database'
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        comment_buffer = get_buffer()
+        if not comment_buffer:
+            self.stdout.write('Comment buffer is disabled, skipping')
+            return
+
+        inserted = comment_buffer.flush()
+        self.stdout.write(self.style.SUCCESS(
+            f'Flushed {inserted} buffered comments!'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.documents import DOCUMENT_VERSION
+from api.models import Movie
+
+
+class Command(BaseCommand):
+    """Django command to store the pre-rendered JSON of movies"""
+
+    help = 'Render movie documents that are missing or out of date, ' \
+           'run after bulk updates and deploys bumping DOCUMENT_VERSION'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Render every movie, not only stale ones')
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        movies = Movie.get_all()
+        if not options['all']:
+            movies = movies.filter(
+                Q(document=b'') | ~Q(document_version=DOCUMENT_VERSION))
+
+        rendered = 0
+        for movie in movies.iterator():
+            movie.save_document()
+            rendered += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} movie documents'))
@@ -0,0 +1,61 @@
+# Generated by Django 2.1.15 on 2026-10-19 10:12
+
+from decimal import Decimal
+
+from django.db import migrations, models
+import orjson
+
+# MovieSerializer output as of this migration, frozen so later changes to
+# the model or serializer don't break it
+FIELDS = (
+    'id', 'title', 'rated', 'released', 'runtime', 'genre', 'director',
+    'writer', 'actors', 'plot', 'language', 'country', 'awards', 'poster',
+    'metascore', 'imdbrating', 'imdbvotes', 'imdbid', 'type', 'dvd',
+    'boxoffice', 'production', 'website',
+)
+DATE_FIELDS = ('released', 'dvd')
+
+
+def render(movie):
+    """
+    :return: the movie's JSON, as ORJSONRenderer renders MovieSerializer
+    """
+    data = {field: getattr(movie, field) for field in FIELDS}
+    for field in DATE_FIELDS:
+        if data[field] is not None:
+            data[field] = data[field].isoformat()
+    data['imdbrating'] = '{:f}'.format(
+        Decimal(movie.imdbrating).quantize(Decimal('0.1')))
+
+    content = orjson.dumps(data)
+    return content.replace(b'\xe2\x80\xa8', b'\\u2028') \
+                  .replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def render_documents(apps, schema_editor):
+    """
+    Renders the document of every existing movie
+    """
+    Movie = apps.get_model('api', 'Movie')
+    for movie in Movie.objects.iterator():
+        Movie.objects.filter(pk=movie.pk).update(document=render(movie))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_comment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='document',
+            field=models.BinaryField(default=b'', editable=False),
+        ),
+        migrations.AlterModelOptions(
+            name='movie',
+            options={'ordering': ('id',)},
+        ),
+        migrations.RunPython(render_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.1.15 on 2026-10-19 11:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_movie_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('added_on', models.DateField()),
+                ('total', models.IntegerField(default=0)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.Movie')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='commentcount',
+            unique_together={('movie', 'added_on')},
+        ),
+    ]
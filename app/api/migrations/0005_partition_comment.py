@@ -0,0 +1,109 @@
+# Generated by Django 2.1.15 on 2026-10-19 11:20
+
+from datetime import date
+
+from django.db import migrations
+
+# Monthly partitions created up front, later ones are added by the
+# create_comment_partitions command
+MONTHS_AHEAD = 3
+
+COLUMNS = 'id, comment, added_on, movie_id'
+
+# Added once the rows are copied: a deferred constraint would queue a
+# trigger event per copied row and CREATE INDEX refuses to run on a table
+# with pending trigger events
+ADD_MOVIE_FK = (
+    'ALTER TABLE api_comment ADD CONSTRAINT api_comment_movie_id_fk '
+    'FOREIGN KEY (movie_id) REFERENCES api_movie (id) '
+    'DEFERRABLE INITIALLY DEFERRED')
+
+
+def add_months(day, months):
+    year, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + year, month + 1, 1)
+
+
+def partition_comments(apps, schema_editor):
+    """
+    Rebuilds api_comment as a table partitioned by month of added_on
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT min(added_on) FROM api_comment')
+        first = cursor.fetchone()[0] or date.today()
+
+        cursor.execute('ALTER SEQUENCE api_comment_id_seq OWNED BY NONE')
+        cursor.execute(
+            "CREATE TABLE api_comment_partitioned ("
+            "id integer NOT NULL DEFAULT nextval('api_comment_id_seq'), "
+            "comment text NOT NULL, "
+            "added_on date NOT NULL, "
+            "movie_id integer NULL, "
+            "PRIMARY KEY (id, added_on)"
+            ") PARTITION BY RANGE (added_on)")
+        cursor.execute(
+            'CREATE TABLE api_comment_default '
+            'PARTITION OF api_comment_partitioned DEFAULT')
+
+        month = add_months(first, 0)
+        last = add_months(date.today(), MONTHS_AHEAD)
+        while month <= last:
+            cursor.execute(
+                f'CREATE TABLE api_comment_y{month.year}m{month.month:02d} '
+                f'PARTITION OF api_comment_partitioned '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [month, add_months(month, 1)])
+            month = add_months(month, 1)
+
+        cursor.execute(
+            f'INSERT INTO api_comment_partitioned ({COLUMNS}) '
+            f'SELECT {COLUMNS} FROM api_comment')
+        cursor.execute('DROP TABLE api_comment')
+        cursor.execute(
+            'ALTER TABLE api_comment_partitioned RENAME TO api_comment')
+        cursor.execute(
+            'CREATE INDEX api_comment_movie_id_idx ON api_comment (movie_id)')
+        cursor.execute(ADD_MOVIE_FK)
+        cursor.execute(
+            'ALTER SEQUENCE api_comment_id_seq OWNED BY api_comment.id')
+
+
+def unpartition_comments(apps, schema_editor):
+    """
+    Rebuilds api_comment as a plain table
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('ALTER SEQUENCE api_comment_id_seq OWNED BY NONE')
+        cursor.execute(
+            "CREATE TABLE api_comment_plain ("
+            "id integer PRIMARY KEY DEFAULT nextval('api_comment_id_seq'), "
+            "comment text NOT NULL, "
+            "added_on date NOT NULL, "
+            "movie_id integer NULL)")
+        cursor.execute(
+            f'INSERT INTO api_comment_plain ({COLUMNS}) '
+            f'SELECT {COLUMNS} FROM api_comment')
+        cursor.execute('DROP TABLE api_comment')
+        cursor.execute('ALTER TABLE api_comment_plain RENAME TO api_comment')
+        cursor.execute(
+            'CREATE INDEX api_comment_movie_id_idx ON api_comment (movie_id)')
+        cursor.execute(ADD_MOVIE_FK)
+        cursor.execute(
+            'ALTER SEQUENCE api_comment_id_seq OWNED BY api_comment.id')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_commentcount'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_comments, unpartition_comments),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.1.15 on 2026-10-19 13:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_partition_comment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Poster',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('content_type', models.CharField(max_length=50)),
+                ('fetched_on', models.DateTimeField(auto_now=True)),
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cached_poster', to='api.Movie')),
+            ],
+        ),
+    ]
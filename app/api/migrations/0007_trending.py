@@ -0,0 +1,36 @@
+# Generated by Django 2.1.15 on 2026-10-19 15:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_poster'),
+    ]
+
+    operations = [
+        # Added without a default first, so existing comments are left
+        # null instead of all being stamped with the migration time
+        migrations.AddField(
+            model_name='comment',
+            name='added_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='added_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, null=True),
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_score', models.FloatField(db_index=True)),
+                ('last_comment_at', models.DateTimeField()),
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trending_score', to='api.Movie')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.15 on 2026-10-19 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='buffer_id',
+            field=models.UUIDField(db_index=True, editable=False, null=True),
+        ),
+    ]
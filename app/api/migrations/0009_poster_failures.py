@@ -0,0 +1,33 @@
+# Generated by Django 2.1.15 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_comment_buffer_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poster',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='poster',
+            name='failures',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='poster',
+            name='content_type',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='poster',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
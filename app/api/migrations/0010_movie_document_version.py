@@ -0,0 +1,24 @@
+# Generated by Django 2.1.15 on 2026-10-19 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_poster_failures'),
+    ]
+
+    operations = [
+        # Documents stored so far are the first version
+        migrations.AddField(
+            model_name='movie',
+            name='document_version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='movie',
+            name='document_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,5 +1,17 @@
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+
+class MovieQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Clears the documents of updated rows, unless given, so reads render
+        them fresh until render_movie_documents stores them again
+        """
+        kwargs.setdefault('document', b'')
+        return super().update(**kwargs)
 
 
 class Movie(models.Model):
@@ -29,19 +41,130 @@ class Movie(models.Model):
     production = models.CharField(max_length=100)
     website = models.URLField()
 
+    # Pre-rendered JSON of the movie, rebuilt on every save, see
+    # api.documents
+    document = models.BinaryField(editable=False, default=b'')
+    document_version = models.PositiveIntegerField(editable=False, default=0)
+
+    objects = MovieQuerySet.as_manager()
+
+    class Meta:
+        # Unordered lists would follow the table's physical order, which
+        # changes as rows are updated
+        ordering = ('id',)
+
+    def save(self, *args, **kwargs):
+        from api.posters import schedule_poster
+        from api.similarity import get_index
+
+        def add_to_index():
+            # Until the index is first built, the similar endpoint builds it
+            index = get_index()
+            if index.exists:
+                index.add(self)
+
+        super().save(*args, **kwargs)
+        transaction.on_commit(lambda: schedule_poster(self.pk))
+        # The file is shared, a rolled back save must leave no row in it
+        transaction.on_commit(add_to_index)
+
+    def save_document(self):
+        """
+        Renders the movie to JSON and stores it in the document column
+        Note: QuerySet.update() only clears the document, run the
+        render_movie_documents command after bulk updates
+        """
+        from api.documents import DOCUMENT_VERSION, render_document
+
+        self.document = render_document(self)
+        self.document_version = DOCUMENT_VERSION
+        Movie.objects.filter(pk=self.pk).update(
+            document=self.document, document_version=DOCUMENT_VERSION)
+
     @classmethod
     def get_all(cls):
-        return cls.objects.all()
+        return cls.objects.defer('document')
+
+
+@receiver(post_save, sender=Movie)
+def render_movie_document(sender, instance, **kwargs):
+    """
+    Rebuilds the document on every save, raw ones (fixtures) included
+    """
+    instance.save_document()
+
+
+class Poster(models.Model):
+    """
+    Locally cached poster of a movie, files are in api.posters
+    """
+    def __str__(self):
+        return self.sha256
+
+    movie = models.OneToOneField(Movie, on_delete=models.CASCADE,
+                                 related_name='cached_poster')
+    url = models.URLField()
+    # Blank while `url` couldn't be fetched
+    sha256 = models.CharField(max_length=64, blank=True)
+    content_type = models.CharField(max_length=50, blank=True)
+    fetched_on = models.DateTimeField(auto_now=True)
+    # Consecutive failed fetches of `url` and when the last one failed
+    failures = models.PositiveIntegerField(default=0)
+    failed_at = models.DateTimeField(null=True, blank=True)
 
 
 class Comment(models.Model):
+    """
+    On PostgreSQL the table is partitioned by month of added_on,
+    see api.partitions
+    """
     def __str__(self):
         return self.comment
 
     comment = models.TextField()
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE, null=True)
     added_on = models.DateField(default=timezone.localdate)
+    # Null for comments posted before it was added
+    added_at = models.DateTimeField(default=timezone.now, null=True)
+    # Set for comments posted through api.comment_buffer
+    buffer_id = models.UUIDField(null=True, editable=False, db_index=True)
+
+    def save(self, *args, **kwargs):
+        from api.trending import record_comments
+
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            record_comments([self])
 
     @classmethod
     def get_all(cls):
         return cls.objects.all()
+
+
+class CommentCount(models.Model):
+    """
+    Per movie, per day comment totals of compacted comment partitions
+    """
+    def __str__(self):
+        return f'{self.movie} {self.added_on}: {self.total}'
+
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE)
+    added_on = models.DateField()
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('movie', 'added_on')
+
+
+class TrendingScore(models.Model):
+    """
+    Exponentially decayed comment activity of a movie, see api.trending
+    """
+    def __str__(self):
+        return f'{self.movie}: {self.log_score}'
+
+    movie = models.OneToOneField(Movie, on_delete=models.CASCADE,
+                                 related_name='trending_score')
+    log_score = models.FloatField(db_index=True)
+    last_comment_at = models.DateTimeField()
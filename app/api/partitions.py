@@ -0,0 +1,103 @@
+"""
+Monthly partitions of the comments table
+
+On PostgreSQL `api_comment` is a declaratively partitioned table, ranged
+on `added_on`, with one partition per month and a default partition that
+catches dates without one. Other databases keep a plain table and every
+helper here is a no-op.
+"""
+import re
+from datetime import date
+
+from django.db import connection, transaction
+
+from api.models import Comment
+
+PARENT = Comment._meta.db_table
+DEFAULT_PARTITION = f'{PARENT}_default'
+PARTITION_RE = re.compile(r'^%s_y(\d{4})m(\d{2})$' % PARENT)
+
+
+def add_months(day, months):
+    """
+    :param day: date
+    :param months: int, can be negative
+    :return: first day of the month `months` away from `day`
+    """
+    year, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + year, month + 1, 1)
+
+
+def partition_name(month):
+    return f'{PARENT}_y{month.year}m{month.month:02d}'
+
+
+def is_partitioned():
+    """
+    Whether the comments table is partitioned in the current database
+    """
+    if connection.vendor != 'postgresql':
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table '
+            'WHERE partrelid = to_regclass(%s)', [PARENT])
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """
+    :return: sorted list of months (first day) that have a partition
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s)', [PARENT])
+        names = [row[0] for row in cursor.fetchall()]
+
+    months = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def create_partition(month):
+    """
+    Creates the partition for `month`, moving matching rows out of the
+    default partition so it can be attached
+    :param month: date, first day of the month
+    :return: True if the partition was created
+    """
+    name = partition_name(month)
+    if month in list_partitions():
+        return False
+
+    start, end = month, add_months(month, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE {name} '
+            f'(LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH moved AS ('
+            f'DELETE FROM {DEFAULT_PARTITION} '
+            f'WHERE added_on >= %s AND added_on < %s RETURNING *) '
+            f'INSERT INTO {name} SELECT * FROM moved', [start, end])
+        cursor.execute(
+            f'ALTER TABLE {PARENT} ATTACH PARTITION {name} '
+            f'FOR VALUES FROM (%s) TO (%s)', [start, end])
+    return True
+
+
+def drop_partition(month):
+    """
+    Detaches and drops the partition for `month`, discarding its rows
+    :param month: date, first day of the month
+    """
+    name = partition_name(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {PARENT} DETACH PARTITION {name}')
+        cursor.execute(f'DROP TABLE {name}')
@@ -0,0 +1,208 @@
+"""
+Local poster cache
+
+Posters are downloaded in a background thread after a movie is saved and
+stored content-addressed under settings.POSTER_CACHE_DIR:
+
+    <sha256[:2]>/<sha256>/original
+    <sha256[:2]>/<sha256>/<width>.jpg
+
+Identical images are stored once, and a path never changes content, so
+the files can be served with immutable cache headers.
+
+A movie has at most one fetch pending, and a url that failed is not
+fetched again before a back-off doubling with each consecutive failure.
+"""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from PIL import Image
+
+from api.models import Movie, Poster
+
+logger = logging.getLogger(__name__)
+
+MAX_BYTES = 10 * 1024 * 1024
+TIMEOUT = 10
+# Fetches queued at once, further ones are dropped until some complete
+MAX_PENDING = 100
+
+_executor = ThreadPoolExecutor(max_workers=2)
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def poster_dir(sha256):
+    return os.path.join(settings.POSTER_CACHE_DIR, sha256[:2], sha256)
+
+
+def poster_path(sha256, size='original'):
+    """
+    :param sha256: hex digest of the original image
+    :param size: 'original' or one of settings.POSTER_SIZES
+    :return: path of the file
+    """
+    name = 'original' if size == 'original' else f'{size}.jpg'
+    return os.path.join(poster_dir(sha256), name)
+
+
+def _write(path, content):
+    """
+    Writes `content` to `path` atomically
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def download(url):
+    """
+    :param url: image url
+    :return: image bytes, None if too large
+    """
+    with requests.get(url, stream=True, timeout=TIMEOUT) as r:
+        r.raise_for_status()
+        content = bytearray()
+        for chunk in r.iter_content(64 * 1024):
+            content += chunk
+            if len(content) > MAX_BYTES:
+                return None
+    return bytes(content)
+
+
+def store(content):
+    """
+    Stores an image and its resized variants
+    :param content: image bytes
+    :return: (sha256, content type)
+    """
+    sha256 = hashlib.sha256(content).hexdigest()
+    image = Image.open(io.BytesIO(content))
+    content_type = Image.MIME.get(image.format, 'application/octet-stream')
+
+    if os.path.exists(poster_path(sha256)):
+        return sha256, content_type
+
+    os.makedirs(poster_dir(sha256), exist_ok=True)
+    image = image.convert('RGB')
+    for size in settings.POSTER_SIZES:
+        variant = image.copy()
+        variant.thumbnail((size, size * 2))
+        buffer = io.BytesIO()
+        variant.save(buffer, 'JPEG', quality=85, optimize=True)
+        _write(poster_path(sha256, size), buffer.getvalue())
+
+    # Written last, it marks the poster as complete
+    _write(poster_path(sha256), content)
+    return sha256, content_type
+
+
+def retry_at(poster):
+    """
+    :param poster: Poster whose last fetch failed
+    :return: when its url may be fetched again
+    """
+    delay = min(settings.POSTER_RETRY_SECONDS * 2 ** (poster.failures - 1),
+                settings.POSTER_RETRY_MAX_SECONDS)
+    return poster.failed_at + timedelta(seconds=delay)
+
+
+def should_fetch(poster, url):
+    """
+    :param poster: Poster of the movie or None
+    :param url: current poster url of the movie
+    :return: True unless `url` is cached or its fetch failed recently
+    """
+    if poster is None or poster.url != url:
+        return True
+    if poster.sha256:
+        return False
+    return retry_at(poster) <= timezone.now()
+
+
+def _record_failure(movie, poster):
+    """
+    Marks the poster url of a movie as failed, dropping a cached poster
+    of a previous url
+    """
+    failures = 1
+    if poster and poster.url == movie.poster and not poster.sha256:
+        failures += poster.failures
+    Poster.objects.update_or_create(
+        movie=movie,
+        defaults={'url': movie.poster, 'sha256': '', 'content_type': '',
+                  'failures': failures, 'failed_at': timezone.now()})
+
+
+def cache_poster(movie_id):
+    """
+    Downloads and stores the poster of a movie, unless already cached or
+    backing off after a failure
+    :param movie_id: Movie pk
+    :return: Poster or None
+    """
+    movie = Movie.get_all().filter(pk=movie_id).first()
+    if not movie or not movie.poster.startswith(('http://', 'https://')):
+        return None
+
+    poster = Poster.objects.filter(movie=movie).first()
+    if not should_fetch(poster, movie.poster):
+        return poster if poster.sha256 else None
+
+    try:
+        content = download(movie.poster)
+        if content is None:
+            logger.warning('Poster of %s is too large', movie)
+            _record_failure(movie, poster)
+            return None
+        sha256, content_type = store(content)
+    except Exception as exc:
+        # Network and disk errors, and whatever PIL raises on the image
+        # (DecompressionBombError isn't an OSError)
+        logger.warning('Could not cache poster of %s: %s', movie, exc)
+        _record_failure(movie, poster)
+        return None
+
+    poster, _ = Poster.objects.update_or_create(
+        movie=movie,
+        defaults={'url': movie.poster, 'sha256': sha256,
+                  'content_type': content_type, 'failures': 0,
+                  'failed_at': None})
+    return poster
+
+
+def _cache_poster_task(movie_id):
+    try:
+        cache_poster(movie_id)
+    except Exception:
+        logger.exception('Poster task failed for movie %s', movie_id)
+    finally:
+        with _pending_lock:
+            _pending.discard(movie_id)
+        # Threads get their own connection, don't leak it
+        connection.close()
+
+
+def schedule_poster(movie_id):
+    """
+    Caches the poster of a movie in the background, unless a fetch for
+    it is already pending or MAX_PENDING fetches are
+    :param movie_id: Movie pk
+    :return: Future or None when not scheduled
+    """
+    with _pending_lock:
+        if movie_id in _pending or len(_pending) >= MAX_PENDING:
+            return None
+        _pending.add(movie_id)
+    return _executor.submit(_cache_poster_task, movie_id)
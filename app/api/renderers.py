@@ -0,0 +1,140 @@
+import msgpack
+import orjson
+from rest_framework import serializers
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+
+# Fields whose output never holds a float
+FLOAT_FREE_FIELDS = (
+    serializers.BooleanField, serializers.CharField,
+    serializers.DateField, serializers.DateTimeField,
+    serializers.DurationField, serializers.FileField,
+    serializers.IntegerField, serializers.RelatedField,
+    serializers.TimeField, serializers.UUIDField,
+)
+
+
+def has_float(data):
+    """
+    Whether serializer data holds a float anywhere
+    Compares the set of value types of each container, so the values
+    themselves are only visited in C
+    :param data: serializer data
+    :return: bool
+    """
+    if not isinstance(data, (dict, list, tuple)):
+        return isinstance(data, float)
+
+    stack = [data]
+    while stack:
+        values = stack.pop()
+        if isinstance(values, dict):
+            values = values.values()
+
+        nested = False
+        for value_type in set(map(type, values)):
+            if issubclass(value_type, float):
+                return True
+            if issubclass(value_type, (dict, list, tuple)):
+                nested = True
+
+        if nested:
+            stack.extend(value for value in values
+                         if isinstance(value, (dict, list, tuple)))
+    return False
+
+
+def field_has_float(field):
+    """
+    Whether a serializer or field may output floats, judged from its
+    declaration so the data doesn't have to be walked
+    Fields not known to be float free count as holding floats
+    :param field: Serializer or Field
+    :return: bool
+    """
+    if isinstance(field, (serializers.ListSerializer, serializers.ListField,
+                          serializers.DictField)):
+        return field_has_float(field.child)
+    if isinstance(field, serializers.Serializer):
+        return any(map(field_has_float, field.fields.values()))
+    if isinstance(field, serializers.DecimalField):
+        # The encoder turns Decimal into float
+        return not getattr(field, 'coerce_to_string',
+                           api_settings.COERCE_DECIMAL_TO_STRING)
+    return not isinstance(field, FLOAT_FREE_FIELDS)
+
+
+def may_hold_float(data):
+    """
+    :param data: data to render
+    :return: False if `data` surely holds no float
+    """
+    serializer = getattr(data, 'serializer', None)
+    if serializer is not None:
+        return field_has_float(serializer)
+    # Error bodies and the like, small enough to walk
+    return has_float(data)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renders JSON with orjson, producing the same bytes as DRF's JSONRenderer
+    Dates and times go through DRF's encoder, data that may hold floats is
+    left to DRF, as orjson writes NaN as null and formats exponents
+    differently. Subclasses of str, int, dict and list are encoded natively,
+    like the stdlib does
+    """
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render `data` into JSON, returning a bytestring.
+        :param data: serializer data
+        :return: bytes
+        """
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+
+        # orjson only indents by 2 spaces, leave pretty printing to DRF
+        if self.get_indent(accepted_media_type, renderer_context) is not None \
+                or may_hold_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=self.options)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits, let the stdlib handle them
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Match DRF, which escapes \u2028 and \u2029 for javascript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028') \
+                     .replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders MessagePack, chosen with `Accept: application/msgpack`
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder_class = JSONRenderer.encoder_class
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render `data` into MessagePack, returning a bytestring.
+        :param data: serializer data
+        :return: bytes
+        """
+        if data is None:
+            return b''
+
+        return msgpack.packb(data, default=self.encoder_class().default,
+                             use_bin_type=True)
@@ -5,7 +5,7 @@ from api.models import Movie ,Comment
 class MovieSerializer(serializers.ModelSerializer):
     class Meta:
         model = Movie
-        fields = '__all__'
+        exclude = ('document', 'document_version')
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -18,3 +18,9 @@ class TopMovieSerializer(serializers.Serializer):
     id = serializers.IntegerField()
     total_comments = serializers.IntegerField()
     rank = serializers.IntegerField()
+
+
+class TrendingMovieSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    score = serializers.FloatField()
+    rank = serializers.IntegerField()
@@ -0,0 +1,199 @@
+"""
+Similar movies index
+
+Every movie is a hashed bag of its genre, director, actors, language and
+country tokens plus its rating, normalised to unit length, so cosine
+similarity is a dot product. The rows live in a single memory-mapped .npy
+file that worker processes map read-only and share through the page cache.
+Saving a movie writes its row in place; a full rebuild is only needed to
+drop deleted movies (see the build_similarity_index command).
+"""
+import fcntl
+import os
+import zlib
+
+import numpy as np
+from django.conf import settings
+
+# Number of hashed feature columns, the last one holds the rating
+FEATURES = 2048
+FIELD_WEIGHTS = {
+    'genre': 1.0,
+    'director': 1.0,
+    'actors': 1.0,
+    'language': 0.5,
+    'country': 0.5,
+}
+RATING_WEIGHT = 0.5
+INITIAL_CAPACITY = 256
+
+DTYPE = np.dtype([('id', '<i8'), ('vector', '<f4', (FEATURES,))])
+
+_indexes = {}
+
+
+def vectorize(movie):
+    """
+    :param movie: Movie
+    :return: unit length float32 feature vector
+    """
+    vector = np.zeros(FEATURES, dtype=np.float32)
+    for field, weight in FIELD_WEIGHTS.items():
+        tokens = {token.strip().lower()
+                  for token in (getattr(movie, field) or '').split(',')}
+        tokens.discard('')
+        tokens.discard('n/a')
+        for token in tokens:
+            column = zlib.crc32(f'{field}:{token}'.encode()) % (FEATURES - 1)
+            # Spread the weight so long cast lists don't dominate
+            vector[column] += weight / np.sqrt(len(tokens))
+
+    vector[-1] = RATING_WEIGHT * float(movie.imdbrating or 0) / 10
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SimilarityIndex:
+    """
+    Movie feature rows in a memory-mapped file
+    Rows are filled in order, ids of unused rows are -1
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._rows = None
+        self._inode = None
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _open(self):
+        """
+        Maps the file read-only, remapping when it was replaced
+        :return: structured array of rows
+        """
+        inode = os.stat(self.path).st_ino
+        if self._rows is None or self._inode != inode:
+            self._rows = np.load(self.path, mmap_mode='r')
+            self._inode = inode
+        return self._rows
+
+    def _lock(self):
+        lock = open(self.path + '.lock', 'w')
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def _write(self, rows):
+        """
+        Atomically replaces the file with `rows`
+        """
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        np.save(tmp_path, rows, allow_pickle=False)
+        os.replace(tmp_path + '.npy', self.path)
+
+    def __len__(self):
+        if not self.exists:
+            return 0
+        return int(np.count_nonzero(self._open()['id'] >= 0))
+
+    def rebuild(self, movies):
+        """
+        Rebuilds the whole index
+        :param movies: iterable of Movie
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        movies = list(movies)
+
+        rows = np.zeros(max(INITIAL_CAPACITY, len(movies)), dtype=DTYPE)
+        rows['id'] = -1
+        for row, movie in enumerate(movies):
+            rows['vector'][row] = vectorize(movie)
+            rows['id'][row] = movie.pk
+
+        with self._lock():
+            self._write(rows)
+
+    def add(self, movie):
+        """
+        Writes the row of a new or updated movie in place
+        :param movie: Movie
+        """
+        with self._lock():
+            rows = np.load(self.path, mmap_mode='r+')
+            ids = rows['id']
+
+            existing = np.flatnonzero(ids == movie.pk)
+            if existing.size:
+                row = existing[0]
+            else:
+                row = int(np.count_nonzero(ids >= 0))
+                if row == len(rows):
+                    grown = np.zeros(len(rows) * 2, dtype=DTYPE)
+                    grown['id'] = -1
+                    grown[:len(rows)] = rows
+                    del rows
+                    self._write(grown)
+                    rows = np.load(self.path, mmap_mode='r+')
+
+            # Vector first, readers only see the row once its id is set
+            rows['vector'][row] = vectorize(movie)
+            rows['id'][row] = movie.pk
+            rows.flush()
+
+    def sync(self, movies):
+        """
+        Adds movies missing from the index, rebuilding it if it doesn't
+        exist yet or holds deleted movies
+        Only compares counts when nothing changed
+        :param movies: Movie queryset
+        """
+        if not self.exists:
+            self.rebuild(movies)
+            return
+        if len(self) == movies.count():
+            return
+
+        indexed = set(self._open()['id'].tolist())
+        indexed.discard(-1)
+        ids = set(movies.values_list('id', flat=True))
+        if indexed - ids:
+            self.rebuild(movies)
+            return
+
+        for movie in movies.filter(id__in=ids - indexed):
+            self.add(movie)
+
+    def similar(self, movie_id, k):
+        """
+        Ranks the catalogue by cosine similarity to a movie
+        :param movie_id: Movie pk
+        :param k: number of movies to return
+        :return: list of Movie pks, most similar first
+        """
+        rows = self._open()
+        count = int(np.count_nonzero(rows['id'] >= 0))
+        ids = rows['id'][:count]
+        vectors = rows['vector'][:count]
+
+        position = np.flatnonzero(ids == movie_id)
+        k = min(k, count - 1)
+        if not position.size or k <= 0:
+            return []
+
+        scores = vectors @ vectors[position[0]]
+        scores[position[0]] = -np.inf
+
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return ids[top].tolist()
+
+
+def get_index():
+    """
+    :return: the SimilarityIndex at settings.SIMILARITY_INDEX_PATH
+    """
+    path = settings.SIMILARITY_INDEX_PATH
+    if path not in _indexes:
+        _indexes[path] = SimilarityIndex(path)
+    return _indexes[path]
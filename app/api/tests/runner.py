@@ -0,0 +1,28 @@
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TempFilesRunner(DiscoverRunner):
+    """
+    Points every file the app writes (similarity index, poster cache,
+    comment buffer) into a temporary directory, so tests never touch the
+    real ones
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.files_override = override_settings(
+            SIMILARITY_INDEX_PATH=f'{self.tmp_dir}/similarity.npy',
+            POSTER_CACHE_DIR=f'{self.tmp_dir}/posters',
+            COMMENT_BUFFER_DIR=f'{self.tmp_dir}/comment-buffer',
+        )
+        self.files_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.files_override.disable()
+        shutil.rmtree(self.tmp_dir)
+        super().teardown_test_environment(**kwargs)
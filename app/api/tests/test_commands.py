@@ -1,8 +1,16 @@
+from datetime import date
+from io import StringIO
+from unittest import skipUnless
 from unittest.mock import patch
 
 from django.core.management import call_command
+from django.db import connection
 from django.db.utils import OperationalError
 from django.test import TestCase
+from django.urls import reverse
+
+from api.models import Comment, CommentCount
+from api.partitions import create_partition, list_partitions, partition_name
 
 
 class CommandTests(TestCase):
@@ -21,3 +29,65 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+
+class CompactCommentsTests(TestCase):
+    fixtures = ['test_data.json']
+
+    def test_compact_comments_keeps_top_rated(self):
+        """Test compacted comments still count in top rated movies"""
+        params = {'start_date': '2022-03-01', 'end_date': '2022-03-31'}
+        before_all = self.client.get(reverse('api:top-rated-movie')).json()
+        before = self.client.get(reverse('api:top-rated-movie'), params).json()
+
+        call_command('compact_comments', months=0, stdout=StringIO())
+
+        self.assertFalse(Comment.objects.filter(added_on__year=2022).exists())
+        self.assertEqual(
+            CommentCount.objects.get(movie_id=2).total, 6)
+        self.assertCountEqual(
+            self.client.get(reverse('api:top-rated-movie'), params).json(),
+            before
+        )
+        self.assertCountEqual(
+            self.client.get(reverse('api:top-rated-movie')).json(),
+            before_all
+        )
+
+    def test_compact_comments_twice(self):
+        """Test compacting again adds to the existing counts"""
+        call_command('compact_comments', months=0, stdout=StringIO())
+        Comment.objects.create(comment='late', movie_id=2,
+                               added_on=date(2022, 3, 20))
+        call_command('compact_comments', months=0, stdout=StringIO())
+
+        self.assertEqual(
+            CommentCount.objects.get(movie_id=2).total, 7)
+
+    @skipUnless(connection.vendor == 'postgresql',
+                'Comments are only partitioned on PostgreSQL')
+    def test_compact_comments_drops_partition(self):
+        """Test a past month partition gets the month's rows and is dropped"""
+        month = date(2022, 3, 1)
+        before_all = self.client.get(reverse('api:top-rated-movie')).json()
+
+        self.assertTrue(create_partition(month))
+        self.assertFalse(create_partition(month))
+        self.assertIn(month, list_partitions())
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {partition_name(month)}')
+            self.assertEqual(cursor.fetchone()[0], 13)
+            cursor.execute('SELECT count(*) FROM api_comment_default '
+                           'WHERE added_on < %s', [date(2022, 4, 1)])
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+        out = StringIO()
+        call_command('compact_comments', months=0, stdout=out)
+
+        self.assertIn('Dropped partition for 2022-03', out.getvalue())
+        self.assertNotIn(month, list_partitions())
+        self.assertFalse(Comment.objects.filter(added_on__year=2022).exists())
+        self.assertCountEqual(
+            self.client.get(reverse('api:top-rated-movie')).json(),
+            before_all
+        )
@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from api.comment_buffer import CommentBuffer, get_buffer
+from api.models import Comment, TrendingScore
+
+
+class CommentBufferTests(TestCase):
+    fixtures = ['test_data.json']
+
+    def setUp(self):
+        buffer_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, buffer_dir)
+        override = self.settings(COMMENT_BUFFER_ENABLED=True,
+                                 COMMENT_BUFFER_DIR=buffer_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        # Flushes are run by the tests, not by a background thread
+        patcher = patch.object(CommentBuffer, 'start_flusher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post_comment(self, comment):
+        return self.client.post(reverse('api:comments'), {
+            'movie_id': 'tt1737174', 'comment': comment})
+
+    def test_post_comment_buffered(self):
+        """
+        POST /comments in buffered mode is visible before it's flushed
+        :return: the comment, accepted
+        """
+
+        count = Comment.objects.count()
+
+        r = self.post_comment('buffered comment')
+        self.assertEqual(r.status_code, 202)
+        self.assertEqual(Comment.objects.count(), count)
+
+        r = self.client.get(reverse('api:comments'),
+                            {'movie_id': 'tt1737174'})
+        self.assertEqual(
+            [c['comment'] for c in r.json()].count('buffered comment'), 1)
+
+        self.assertEqual(get_buffer().flush(), 1)
+        self.assertEqual(Comment.objects.count(), count + 1)
+        self.assertTrue(TrendingScore.objects.exists())
+
+        r = self.client.get(reverse('api:comments'))
+        self.assertEqual(
+            [c['comment'] for c in r.json()].count('buffered comment'), 1)
+
+    def test_append_after_torn_line(self):
+        """
+        A comment appended after a crash tore the last line is flushed
+        """
+
+        comment_buffer = get_buffer()
+        with open(comment_buffer.log_path, 'wb') as f:
+            f.write(b'{"buffer_id": "torn')
+
+        count = Comment.objects.count()
+        self.assertEqual(self.post_comment('after crash').status_code, 202)
+
+        self.assertEqual(
+            [c.comment for c in comment_buffer.pending()], ['after crash'])
+        self.assertEqual(comment_buffer.flush(), 1)
+        self.assertEqual(Comment.objects.count(), count + 1)
+
+    def test_replay_is_idempotent(self):
+        """
+        Replaying a log that was already flushed inserts nothing
+        """
+
+        self.post_comment('first')
+        self.post_comment('second')
+        comment_buffer = get_buffer()
+        with open(comment_buffer.log_path, 'rb') as f:
+            log = f.read()
+
+        call_command('flush_comment_buffer', stdout=StringIO())
+        count = Comment.objects.count()
+
+        # A crash between the commit and removing the log
+        segment = f'{comment_buffer.directory}/comments-1.flushing'
+        with open(segment, 'wb') as f:
+            f.write(log + b'{"torn')
+
+        self.assertEqual(comment_buffer.flush(), 0)
+        self.assertEqual(Comment.objects.count(), count)
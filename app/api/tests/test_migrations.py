@@ -0,0 +1,91 @@
+from datetime import date
+
+import orjson
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from api.serializers import MovieSerializer
+
+MOVIE = {
+    'title': 'Hell', 'rated': 'R', 'runtime': '89 min',
+    'genre': 'Horror, Sci-Fi, Thriller', 'director': 'Tim Fehlbaum',
+    'writer': 'Tim Fehlbaum', 'actors': 'Hannah Herzsprung', 'plot': 'Hot.',
+    'language': 'German', 'country': 'Germany', 'awards': 'N/A',
+    'poster': 'N/A', 'metascore': 0, 'imdbrating': '5.9', 'imdbvotes': 1,
+    'imdbid': 'tt1737174', 'type': 'movie', 'boxoffice': 0,
+    'production': 'N/A', 'website': 'N/A',
+}
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Migrates back to `migrate_from` and forward to `migrate_to`"""
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('api', self.migrate_from)])
+        self.old_apps = executor.loader.project_state(
+            [('api', self.migrate_from)]).apps
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('api', self.migrate_to)])
+        return executor.loader.project_state(
+            [('api', self.migrate_to)]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+class MovieDocumentMigrationTests(MigrationTestCase):
+    migrate_from = '0002_comment'
+    migrate_to = '0003_movie_document'
+
+    def test_documents_backfilled(self):
+        """Test existing movies get their document rendered"""
+        Movie = self.old_apps.get_model('api', 'Movie')
+        movie = Movie.objects.create(**MOVIE)
+
+        apps = self.migrate()
+
+        document = apps.get_model('api', 'Movie').objects.get(pk=movie.pk) \
+            .document
+        data = orjson.loads(bytes(document))
+        self.assertEqual(list(data), list(MovieSerializer().fields))
+        self.assertEqual(data['imdbid'], 'tt1737174')
+        self.assertEqual(data['imdbrating'], '5.9')
+        self.assertIsNone(data['released'])
+
+
+class PartitionCommentMigrationTests(MigrationTestCase):
+    migrate_from = '0004_commentcount'
+    migrate_to = '0005_partition_comment'
+
+    def test_existing_comments_kept(self):
+        """Test comments survive partitioning and unpartitioning"""
+        Movie = self.old_apps.get_model('api', 'Movie')
+        Comment = self.old_apps.get_model('api', 'Comment')
+        movie = Movie.objects.create(**MOVIE)
+        for added_on in (date(2024, 1, 15), date(2024, 3, 2)):
+            Comment.objects.create(movie=movie, comment='Hot.',
+                                   added_on=added_on)
+        expected = list(Comment.objects.order_by('id').values_list(
+            'id', 'added_on', 'movie_id'))
+
+        apps = self.migrate()
+        Comment = apps.get_model('api', 'Comment')
+        self.assertEqual(list(Comment.objects.order_by('id').values_list(
+            'id', 'added_on', 'movie_id')), expected)
+        Comment.objects.create(movie_id=movie.pk, comment='Hotter.',
+                               added_on=date(2024, 3, 3))
+
+        executor = MigrationExecutor(connection)
+        executor.migrate([('api', self.migrate_from)])
+        Comment = executor.loader.project_state(
+            [('api', self.migrate_from)]).apps.get_model('api', 'Comment')
+        self.assertEqual(Comment.objects.count(), 3)
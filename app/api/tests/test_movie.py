@@ -1,12 +1,21 @@
+import shutil
+import tempfile
 from datetime import date
+from io import StringIO
+from unittest.mock import patch
 
+import orjson
+from django.core.management import call_command
 from django.db.models import Count, Window, F
 from django.db.models.functions import DenseRank
-from django.test import TestCase
+from django.db import IntegrityError, transaction
+from django.test import TestCase, TransactionTestCase
 from django.urls import reverse
 from django.utils import timezone
 
+from api.documents import DOCUMENT_VERSION
 from api.models import Movie, Comment
+from api.similarity import get_index
 from api.serializers import MovieSerializer, CommentSerializer, TopMovieSerializer
 
 
@@ -137,6 +146,95 @@ class MoviesTests(TestCase):
         )
         self.assertEqual(r.status_code, 200)
 
+    def test_get_movie_detail(self):
+        """
+        GET /movies/<imdbid> gets a single movie
+        :return: the movie in json
+        """
+
+        movie = Movie.objects.get(imdbid='tt1737174')
+        serializer = MovieSerializer(movie)
+
+        r = self.client.get(reverse('api:movie-detail', args=['tt1737174']))
+        self.assertJSONEqual(
+            r.content,
+            serializer.data
+        )
+        self.assertEqual(r.status_code, 200)
+
+    def test_get_movie_detail_not_exist(self):
+        """
+        GET /movies/<imdbid> for a movie not in DB
+        :return: error message
+        """
+
+        r = self.client.get(reverse('api:movie-detail', args=['testid']))
+        self.assertJSONEqual(
+            r.content,
+            '{"error": "Movie with movie id testid, doesn\'t exist in DB"}'
+        )
+        self.assertEqual(r.status_code, 404)
+
+    def test_fixture_movies_have_documents(self):
+        """
+        Raw saves (fixtures) render documents, reads don't have to
+        """
+
+        self.assertFalse(Movie.objects.filter(document=b'').exists())
+
+    def test_movie_document_rebuilt_on_save(self):
+        """
+        Saving a movie re-renders its stored document
+        """
+
+        movie = Movie.objects.get(imdbid='tt1737174')
+        movie.title = 'Renamed'
+        movie.save()
+
+        r = self.client.get(reverse('api:movies'))
+        titles = [m['title'] for m in r.json() if m['imdbid'] == 'tt1737174']
+        self.assertEqual(titles, ['Renamed'])
+        self.assertJSONEqual(
+            bytes(Movie.objects.get(pk=movie.pk).document),
+            MovieSerializer(movie).data
+        )
+
+    def test_movie_document_after_update(self):
+        """
+        Rows changed with QuerySet.update() are served fresh, and stored
+        again by render_movie_documents
+        """
+
+        movie = Movie.objects.get(imdbid='tt1737174')
+        Movie.objects.filter(pk=movie.pk).update(title='UPDATED')
+
+        r = self.client.get(reverse('api:movie-detail', args=['tt1737174']))
+        self.assertEqual(r.json()['title'], 'UPDATED')
+
+        call_command('render_movie_documents', stdout=StringIO())
+        self.assertEqual(
+            orjson.loads(bytes(Movie.objects.get(pk=movie.pk).document))
+            ['title'], 'UPDATED')
+
+    def test_movie_document_stale_version(self):
+        """
+        Documents of an older DOCUMENT_VERSION are not served
+        """
+
+        movie = Movie.objects.get(imdbid='tt1737174')
+        Movie.objects.filter(pk=movie.pk).update(
+            document=b'{"title": "old"}', document_version=0)
+
+        r = self.client.get(reverse('api:movies'))
+        titles = [m['title'] for m in r.json() if m['imdbid'] == 'tt1737174']
+        self.assertEqual(titles, [movie.title])
+
+        call_command('render_movie_documents', stdout=StringIO())
+        movie = Movie.objects.get(pk=movie.pk)
+        self.assertEqual(movie.document_version, DOCUMENT_VERSION)
+        self.assertJSONEqual(bytes(movie.document),
+                             MovieSerializer(movie).data)
+
     def test_get_movie_top_all(self):
         """
         GET /top movies ordered by rank on total comments
@@ -151,7 +249,7 @@ class MoviesTests(TestCase):
                           expression=DenseRank(),
                           order_by=F('total_comments').desc(),
             )
-            ).values('id', 'total_comments', 'rank')
+            ).values('id', 'total_comments', 'rank').order_by('rank', 'id')
 
         serializer = TopMovieSerializer(qs, many=True)
 
@@ -180,7 +278,7 @@ class MoviesTests(TestCase):
                           expression=DenseRank(),
                           order_by=F('total_comments').desc(),
             )
-            ).values('id', 'total_comments', 'rank')
+            ).values('id', 'total_comments', 'rank').order_by('rank', 'id')
 
         serializer = TopMovieSerializer(qs, many=True)
 
@@ -191,6 +289,83 @@ class MoviesTests(TestCase):
         self.assertEqual(r.status_code, 200)
 
 
+class SimilarMoviesTests(TransactionTestCase):
+    """Movies are indexed once their save commits, so saves must commit"""
+    fixtures = ['test_data.json']
+
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        override = self.settings(
+            SIMILARITY_INDEX_PATH=f'{tmp_dir}/similarity.npy')
+        override.enable()
+        self.addCleanup(override.disable)
+
+        # Committed saves schedule poster downloads too
+        schedule_poster = patch('api.posters.schedule_poster')
+        schedule_poster.start()
+        self.addCleanup(schedule_poster.stop)
+
+    def test_get_similar_movies(self):
+        """
+        GET /movies/<imdbid>/similar ranks other movies by similarity
+        :return: k movies in json
+        """
+
+        r = self.client.get(reverse('api:movie-similar', args=['tt1737174']),
+                            {'k': 2})
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.json()), 2)
+        self.assertNotIn('tt1737174', [m['imdbid'] for m in r.json()])
+
+    def test_similar_movies_include_new_movie(self):
+        """
+        A saved movie is added to the index and ranks first when identical
+        """
+
+        self.client.get(reverse('api:movie-similar', args=['tt1737174']))
+
+        movie = Movie.objects.get(imdbid='tt1737174')
+        movie.pk = None
+        movie.imdbid = 'tt_copy'
+        movie.save()
+
+        r = self.client.get(reverse('api:movie-similar', args=['tt1737174']),
+                            {'k': 1})
+        self.assertEqual([m['imdbid'] for m in r.json()], ['tt_copy'])
+        self.assertEqual(len(get_index()), Movie.objects.count())
+
+    def test_similar_movies_skip_rolled_back_movie(self):
+        """
+        A movie whose save is rolled back never reaches the index
+        """
+
+        self.client.get(reverse('api:movie-similar', args=['tt1737174']))
+
+        movie = Movie.objects.get(imdbid='tt1737174')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            movie.pk = None
+            movie.save()
+            raise IntegrityError
+
+        self.assertEqual(len(get_index()), Movie.objects.count())
+
+    def test_get_similar_movies_invalid_k(self):
+        """
+        GET /movies/<imdbid>/similar with a bad k
+        :return: error message
+        """
+
+        r = self.client.get(reverse('api:movie-similar', args=['tt1737174']),
+                            {'k': 'ten'})
+        self.assertJSONEqual(
+            r.content,
+            '{"error": "k must be a number between 1 and 100"}'
+        )
+        self.assertEqual(r.status_code, 400)
+
+
 class CommentTests(TestCase):
     fixtures = ['test_data.json']
 
@@ -0,0 +1,171 @@
+import io
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from api import posters
+from api.models import Movie, Poster
+from api.posters import cache_poster, schedule_poster
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class PosterTests(TestCase):
+    fixtures = ['test_data.json']
+
+    def setUp(self):
+        # Local file server standing in for the remote image host
+        served_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, served_dir)
+        Image.new('RGB', (300, 444), 'red').save(f'{served_dir}/poster.png')
+
+        server = HTTPServer(('127.0.0.1', 0),
+                            partial(QuietHandler, directory=served_dir))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        override = self.settings(POSTER_CACHE_DIR=cache_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.movie = Movie.get_all().get(imdbid='tt1737174')
+        self.base_url = f'http://127.0.0.1:{server.server_port}'
+        self.movie.poster = f'{self.base_url}/poster.png'
+        Movie.objects.filter(pk=self.movie.pk).update(poster=self.movie.poster)
+
+    def test_cache_poster(self):
+        """
+        Caching a poster stores it once with its resized variants
+        """
+
+        poster = cache_poster(self.movie.pk)
+
+        self.assertEqual(poster.content_type, 'image/png')
+        self.assertEqual(poster.url, self.movie.poster)
+        self.assertEqual(cache_poster(self.movie.pk), poster)
+
+    def test_get_poster(self):
+        """
+        GET /movies/<imdbid>/poster redirects to the cached file
+        :return: resized jpeg with long lived cache headers
+        """
+
+        poster = cache_poster(self.movie.pk)
+
+        r = self.client.get(reverse('api:movie-poster', args=['tt1737174']),
+                            {'size': 100})
+        file_url = reverse('api:poster-file', args=[poster.sha256, '100'])
+        self.assertRedirects(r, file_url, fetch_redirect_response=False)
+
+        r = self.client.get(file_url, HTTP_ACCEPT='image/jpeg')
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', r['Cache-Control'])
+        image = Image.open(io.BytesIO(b''.join(r.streaming_content)))
+        self.assertEqual(image.size, (100, 148))
+
+        r = self.client.get(file_url,
+                            HTTP_IF_NONE_MATCH=f'"{poster.sha256}-100"')
+        self.assertEqual(r.status_code, 304)
+
+    @patch('api.views.schedule_poster')
+    def test_get_poster_not_cached(self, schedule_poster):
+        """
+        GET /movies/<imdbid>/poster before the poster is cached
+        :return: redirect to the remote poster
+        """
+
+        r = self.client.get(reverse('api:movie-poster', args=['tt1737174']))
+
+        self.assertRedirects(r, self.movie.poster,
+                             fetch_redirect_response=False)
+        schedule_poster.assert_called_once_with(self.movie.pk)
+        self.assertFalse(Poster.objects.exists())
+
+    def test_cache_poster_failure(self):
+        """
+        A failed fetch is recorded and not retried before its back-off
+        """
+
+        missing = f'{self.base_url}/missing.png'
+        Movie.objects.filter(pk=self.movie.pk).update(poster=missing)
+
+        self.assertIsNone(cache_poster(self.movie.pk))
+        poster = Poster.objects.get(movie=self.movie)
+        self.assertEqual((poster.url, poster.sha256, poster.failures),
+                         (missing, '', 1))
+
+        with patch('api.posters.download') as download:
+            self.assertIsNone(cache_poster(self.movie.pk))
+            download.assert_not_called()
+
+        # Past the back-off the fetch is retried and fails again
+        Poster.objects.filter(pk=poster.pk).update(
+            failed_at=timezone.now() - timedelta(minutes=2))
+        self.assertIsNone(cache_poster(self.movie.pk))
+        self.assertEqual(Poster.objects.get(pk=poster.pk).failures, 2)
+
+        # A new url is fetched right away
+        Movie.objects.filter(pk=self.movie.pk).update(poster=self.movie.poster)
+        poster = cache_poster(self.movie.pk)
+        self.assertEqual((poster.url, poster.failures, poster.failed_at),
+                         (self.movie.poster, 0, None))
+
+    @patch('PIL.Image.MAX_IMAGE_PIXELS', 1000)
+    def test_cache_poster_decompression_bomb(self):
+        """
+        An image too large to decode is recorded as a failure
+        """
+
+        self.assertIsNone(cache_poster(self.movie.pk))
+        poster = Poster.objects.get(movie=self.movie)
+        self.assertEqual((poster.sha256, poster.failures), ('', 1))
+
+    @patch('api.views.schedule_poster')
+    def test_get_poster_failed(self, schedule_poster):
+        """
+        GET /movies/<imdbid>/poster after the fetch failed
+        :return: redirect to the remote poster, without fetching it again
+        """
+
+        Poster.objects.create(movie=self.movie, url=self.movie.poster,
+                              failures=1, failed_at=timezone.now())
+
+        r = self.client.get(reverse('api:movie-poster', args=['tt1737174']))
+
+        self.assertRedirects(r, self.movie.poster,
+                             fetch_redirect_response=False)
+        schedule_poster.assert_not_called()
+
+    @patch('api.posters._executor')
+    def test_schedule_poster_pending(self, executor):
+        """
+        A movie has at most one fetch pending
+        """
+
+        self.addCleanup(posters._pending.clear)
+
+        schedule_poster(self.movie.pk)
+        self.assertIsNone(schedule_poster(self.movie.pk))
+        executor.submit.assert_called_once_with(posters._cache_poster_task,
+                                                self.movie.pk)
+
+        with patch('api.posters.cache_poster'):
+            posters._cache_poster_task(self.movie.pk)
+        schedule_poster(self.movie.pk)
+        self.assertEqual(executor.submit.call_count, 2)
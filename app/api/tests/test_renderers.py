@@ -0,0 +1,105 @@
+from datetime import datetime
+
+import msgpack
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Movie
+from api.renderers import ORJSONRenderer, field_has_float
+from api.serializers import MovieSerializer, TrendingMovieSerializer
+
+
+class RendererTests(TestCase):
+    fixtures = ['test_data.json']
+
+    def test_orjson_matches_json_renderer(self):
+        """
+        ORJSONRenderer output is byte for byte the same as JSONRenderer
+        """
+
+        data = MovieSerializer(Movie.get_all(), many=True).data
+        self.assertEqual(
+            ORJSONRenderer().render(data),
+            JSONRenderer().render(data)
+        )
+
+        # Without a serializer to tell, the data is checked for floats
+        data = list(data)
+        data.append({'line': 'sep \u2028 para \u2029 \u00fcn\u00efcode'})
+        data.append({'aware': datetime(2022, 3, 20, 10, tzinfo=timezone.utc),
+                     'naive': datetime(2022, 3, 20, 10, 0, 0, 1500)})
+
+        self.assertEqual(
+            ORJSONRenderer().render(data),
+            JSONRenderer().render(data)
+        )
+
+        data.append({'small': 1.2e-05, 'large': 1e16})
+        self.assertEqual(
+            ORJSONRenderer().render(data),
+            JSONRenderer().render(data)
+        )
+
+    def test_orjson_float_serializer(self):
+        """
+        Data of serializers with float fields renders the same as well
+        """
+
+        data = TrendingMovieSerializer([
+            {'id': 1, 'score': 1.2e-05, 'rank': 1},
+            {'id': 2, 'score': 1e16, 'rank': 2},
+        ], many=True).data
+
+        self.assertTrue(field_has_float(data.serializer))
+        self.assertFalse(field_has_float(MovieSerializer()))
+        self.assertEqual(
+            ORJSONRenderer().render(data),
+            JSONRenderer().render(data)
+        )
+
+    def test_orjson_nan_raises(self):
+        """
+        NaN isn't valid JSON, both renderers refuse it
+        """
+
+        data = [{'nan': float('nan')}]
+
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+        with self.assertRaises(ValueError):
+            ORJSONRenderer().render(data)
+
+    def test_get_movies_msgpack(self):
+        """
+        GET /movies with Accept: application/msgpack
+        :return: all movies in msgpack
+        """
+
+        serializer = MovieSerializer(Movie.get_all(), many=True)
+
+        r = self.client.get(reverse('api:movies'),
+                            HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(r['Content-Type'], 'application/msgpack')
+        self.assertEqual(
+            msgpack.unpackb(r.content, raw=False),
+            [dict(movie) for movie in serializer.data]
+        )
+        self.assertEqual(r.status_code, 200)
+
+    def test_post_comment_msgpack(self):
+        """
+        POST /comments with a msgpack body
+        :return: new comment
+        """
+
+        r = self.client.post(
+            reverse('api:comments'),
+            msgpack.packb({'movie_id': 'tt1737174', 'comment': 'packed'}),
+            content_type='application/msgpack'
+        )
+
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.json()['comment'], 'packed')
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from api.models import Comment, TrendingScore
+from api.trending import top
+
+
+class TrendingTests(TestCase):
+    fixtures = ['test_data.json']
+
+    def comment(self, movie_id, hours_ago):
+        Comment.objects.create(
+            comment='trending', movie_id=movie_id,
+            added_at=timezone.now() - timedelta(hours=hours_ago))
+
+    def test_scores_decay(self):
+        """
+        A comment's weight halves every half life
+        """
+
+        now = timezone.now()
+        Comment.objects.create(comment='a', movie_id=1, added_at=now)
+        Comment.objects.create(comment='b', movie_id=1,
+                               added_at=now - timedelta(hours=6))
+
+        self.assertAlmostEqual(top(1, 24, now)[0]['score'], 1.5)
+        self.assertAlmostEqual(
+            top(1, 24, now + timedelta(hours=6))[0]['score'], 0.75)
+        self.assertEqual(TrendingScore.objects.count(), 1)
+
+    def test_get_trending(self):
+        """
+        GET /movies/trending ranks recent activity above older activity
+        :return: top movies with their scores
+        """
+
+        self.comment(1, 0)
+        self.comment(1, 1)
+        for _ in range(3):
+            self.comment(2, 20)
+        self.comment(3, 30)
+
+        r = self.client.get(reverse('api:trending-movies'), {'hours': 24})
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([m['id'] for m in r.json()], [1, 2])
+        self.assertEqual([m['rank'] for m in r.json()], [1, 2])
+
+    def test_get_trending_invalid_params(self):
+        """
+        GET /movies/trending with bad params
+        :return: error message
+        """
+
+        r = self.client.get(reverse('api:trending-movies'), {'hours': 0})
+        self.assertJSONEqual(
+            r.content,
+            '{"error": "k must be between 1 and 100 '
+            'and hours between 1 and 168"}'
+        )
+        self.assertEqual(r.status_code, 400)
@@ -0,0 +1,92 @@
+"""
+Trending movies
+
+A movie's score is the sum of its comments' weights, each weight halving
+every settings.TRENDING_HALF_LIFE_HOURS:
+
+    score(now) = sum(exp(-rate * (now - t))) = exp(log_score - rate * now)
+    log_score = log(sum(exp(rate * t)))
+
+The rate is baked into log_score when a comment is recorded, so the
+half-life is fixed rather than derived from the requested window.
+
+log_score doesn't depend on `now`, so a comment only adds its term to one
+row, ordering by log_score ranks by current score without decaying any
+row, and the decay is applied only to the k rows returned.
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import TrendingScore
+
+
+def decay_rate():
+    """
+    :return: decay per second
+    """
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def logaddexp(a, b):
+    """
+    :return: log(exp(a) + exp(b)) without overflowing
+    """
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def record_comments(comments):
+    """
+    Adds comments to their movies' trending scores
+    :param comments: iterable of Comment
+    """
+    rate = decay_rate()
+    by_movie = defaultdict(list)
+    for comment in comments:
+        if comment.movie_id and comment.added_at:
+            by_movie[comment.movie_id].append(comment.added_at)
+
+    for movie_id, times in by_movie.items():
+        log_score = rate * times[0].timestamp()
+        for at in times[1:]:
+            log_score = logaddexp(log_score, rate * at.timestamp())
+
+        with transaction.atomic():
+            score, created = TrendingScore.objects.select_for_update() \
+                .get_or_create(movie_id=movie_id,
+                               defaults={'log_score': log_score,
+                                         'last_comment_at': max(times)})
+            if not created:
+                score.log_score = logaddexp(score.log_score, log_score)
+                score.last_comment_at = max(score.last_comment_at, *times)
+                score.save()
+
+
+def top(k, hours, now=None):
+    """
+    Movies with the highest decayed score among those commented on in
+    the last `hours`
+    `hours` only filters movies, scores include older comments too
+    :param k: number of movies
+    :param hours: window length
+    :return: list of {'id', 'score', 'rank'}
+    """
+    now = now or timezone.now()
+    rate = decay_rate()
+
+    qs = TrendingScore.objects \
+        .filter(last_comment_at__gte=now - timedelta(hours=hours)) \
+        .order_by('-log_score') \
+        .values_list('movie_id', 'log_score')[:k]
+
+    return [
+        {'id': movie_id,
+         'score': math.exp(log_score - rate * now.timestamp()),
+         'rank': rank}
+        for rank, (movie_id, log_score) in enumerate(qs, start=1)
+    ]
@@ -6,6 +6,16 @@ app_name = 'api'
 urlpatterns = [
 
     path('movies', views.MoviesView.as_view(), name='movies'),
+    path('movies/trending', views.TrendingMovieView.as_view(),
+         name='trending-movies'),
+    path('movies/<str:imdbid>', views.MovieDetailView.as_view(),
+         name='movie-detail'),
+    path('movies/<str:imdbid>/similar', views.SimilarMoviesView.as_view(),
+         name='movie-similar'),
+    path('movies/<str:imdbid>/poster', views.MoviePosterView.as_view(),
+         name='movie-poster'),
+    path('posters/<str:sha256>/<str:size>', views.PosterFileView.as_view(),
+         name='poster-file'),
     path('comments', views.CommentsView.as_view(), name='comments'),
     path('top-rated-movie', views.TopRatedMovieView.as_view(),
          name='top-rated-movie'),
@@ -1,9 +1,20 @@
-from django.shortcuts import render
+import os
+import re
+
+from django.http import FileResponse, HttpResponseNotModified
+from django.shortcuts import redirect, render
 from datetime import datetime
 
-from django.db.models import Count, Window, F
-from django.db.models.functions import DenseRank
-from api.serializers import CommentSerializer, MovieSerializer, TopMovieSerializer
+from django.db.models import (Count, F, IntegerField, OuterRef, Subquery,
+                              Sum, Window)
+from django.db.models.functions import Coalesce, DenseRank
+from api.comment_buffer import get_buffer
+from api.documents import documents_response, get_documents
+from api.posters import poster_path, schedule_poster, should_fetch
+from api.similarity import get_index
+from api.trending import top
+from api.serializers import (CommentSerializer, MovieSerializer,
+                             TopMovieSerializer, TrendingMovieSerializer)
 from app import settings
 from rest_framework import status
 from rest_framework.views import APIView
@@ -11,7 +22,7 @@ from rest_framework.response import Response
 
 import requests
 
-from .models import Movie ,Comment
+from .models import Movie ,Comment, CommentCount, Poster
 
 
 
@@ -93,9 +104,8 @@ class MoviesView(APIView):
 
         # Send movies without ordering if order_by not provided
         if not order_by:
-            # return all_json_response(Movie)
-            serializer = MovieSerializer(Movie.get_all(), many=True)
-            return Response(serializer.data)
+            documents = get_documents(Movie.get_all())
+            return documents_response(request, documents)
         else:
            
             # order_by accepts'title' and 'rating' only
@@ -107,8 +117,127 @@ class MoviesView(APIView):
 
             qs = Movie.get_all().order_by(order_by)
 
-            serializer = MovieSerializer(qs, many=True)
-            return Response(serializer.data)
+            documents = get_documents(qs)
+            return documents_response(request, documents)
+
+
+class MovieDetailView(APIView):
+    def get(self, request, imdbid, format=None):
+
+        documents = get_documents(Movie.objects.filter(imdbid=imdbid)[:1])
+        if not documents:
+            response = {
+                'error': f'Movie with movie id {imdbid}, doesn\'t exist in DB'
+            }
+            return Response(response, status.HTTP_404_NOT_FOUND)
+
+        return documents_response(request, documents, many=False)
+
+
+class SimilarMoviesView(APIView):
+    def get(self, request, imdbid, format=None):
+
+        # Validate k
+        try:
+            k = int(request.GET.get('k', 10))
+        except ValueError:
+            k = 0
+        if not 1 <= k <= 100:
+            response = {
+                'error': 'k must be a number between 1 and 100'
+            }
+            return Response(response, status.HTTP_400_BAD_REQUEST)
+
+        movie = Movie.get_all().filter(imdbid=imdbid).first()
+        if not movie:
+            response = {
+                'error': f'Movie with movie id {imdbid}, doesn\'t exist in DB'
+            }
+            return Response(response, status.HTTP_404_NOT_FOUND)
+
+        index = get_index()
+        index.sync(Movie.get_all())
+        ids = index.similar(movie.pk, k)
+
+        # Keep the similarity order
+        qs = Movie.get_all().filter(id__in=ids).order_by('id')
+        documents = dict(zip(qs.values_list('id', flat=True),
+                             get_documents(qs)))
+        return documents_response(
+            request, [documents[pk] for pk in ids if pk in documents])
+
+
+class MoviePosterView(APIView):
+    def perform_content_negotiation(self, request, force=False):
+        # Images are served whatever the client accepts
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, imdbid, format=None):
+
+        size = request.GET.get('size', 'original')
+        if size != 'original' and size not in map(str, settings.POSTER_SIZES):
+            response = {
+                'error': 'size must be original or one of '
+                         f'{settings.POSTER_SIZES}'
+            }
+            return Response(response, status.HTTP_400_BAD_REQUEST)
+
+        movie = Movie.get_all().filter(imdbid=imdbid).first()
+        if not movie:
+            response = {
+                'error': f'Movie with movie id {imdbid}, doesn\'t exist in DB'
+            }
+            return Response(response, status.HTTP_404_NOT_FOUND)
+
+        poster = Poster.objects.filter(movie=movie).first()
+        if poster and poster.url == movie.poster and poster.sha256:
+            return redirect('api:poster-file', poster.sha256, size)
+
+        # Not cached yet, fall back to the remote image meanwhile
+        if not movie.poster.startswith(('http://', 'https://')):
+            response = {
+                'error': f'Movie with movie id {imdbid} has no poster'
+            }
+            return Response(response, status.HTTP_404_NOT_FOUND)
+
+        if should_fetch(poster, movie.poster):
+            schedule_poster(movie.pk)
+        return redirect(movie.poster)
+
+
+class PosterFileView(APIView):
+    def perform_content_negotiation(self, request, force=False):
+        # Images are served whatever the client accepts
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, sha256, size, format=None):
+
+        # Validate before building the path from user input
+        valid = re.fullmatch('[0-9a-f]{64}', sha256) and \
+            (size == 'original' or size in map(str, settings.POSTER_SIZES))
+        path = poster_path(sha256, size) if valid else None
+        if not path or not os.path.exists(path):
+            response = {
+                'error': 'Poster not found'
+            }
+            return Response(response, status.HTTP_404_NOT_FOUND)
+
+        # Paths are content addressed, their content never changes
+        etag = f'"{sha256}-{size}"'
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            content_type = 'image/jpeg'
+            if size == 'original':
+                content_type = Poster.objects.filter(sha256=sha256) \
+                    .values_list('content_type', flat=True).first() \
+                    or 'application/octet-stream'
+            # FileResponse lets the server use sendfile()
+            response = FileResponse(open(path, 'rb'),
+                                    content_type=content_type)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
 
 
 class CommentsView(APIView):
@@ -133,6 +262,14 @@ class CommentsView(APIView):
 
         movie = Movie.objects.get(imdbid=movie_id)
         new_comment = Comment(comment=comment, movie=movie)
+
+        # Buffered mode, acknowledge once logged, it's saved in a batch
+        comment_buffer = get_buffer()
+        if comment_buffer:
+            comment_buffer.append(new_comment)
+            serializer = CommentSerializer(new_comment)
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
         new_comment.save()
 
         # Return newly saved comment
@@ -145,31 +282,55 @@ class CommentsView(APIView):
         # Filter
         if movie_id:
             qs = Comment.objects.filter(movie__imdbid=movie_id)
-            serializer = CommentSerializer(qs, many=True)
-            return Response(serializer.data)
+        else:
+            qs = Comment.get_all()
+        data = CommentSerializer(qs, many=True).data
 
-        serializer = CommentSerializer(Comment.get_all(), many=True)
-        return Response(serializer.data)
+        # Add buffered comments not flushed yet
+        comment_buffer = get_buffer()
+        if comment_buffer:
+            flushed = {comment['buffer_id'] for comment in data}
+            pending = [comment for comment in comment_buffer.pending(movie_id)
+                       if str(comment.buffer_id) not in flushed]
+            data += CommentSerializer(pending, many=True).data
+
+        return Response(data)
 
 
 class TopRatedMovieView(APIView):
     def create_qs_for_top(self, with_filter=False, start_date='', end_date=''):
         """"
         Creates query string according to date filter
+        Totals add up raw comments and the CommentCount rollups of
+        compacted comments, so old date ranges keep their results
         :param start_date: string
         :param end_date: string
             Returns the Top Rated movie with most comments
         """
-        qs = Movie.objects
+        comments = Comment.objects.filter(movie=OuterRef('pk'))
+        counts = CommentCount.objects.filter(movie=OuterRef('pk'))
         if with_filter:
-            qs = qs.filter(comment__added_on__range=(start_date, end_date))
+            comments = comments.filter(added_on__range=(start_date, end_date))
+            counts = counts.filter(added_on__range=(start_date, end_date))
+
+        comments = comments.order_by().values('movie') \
+            .annotate(total=Count('comment')).values('total')
+        counts = counts.order_by().values('movie') \
+            .annotate(total=Sum('total')).values('total')
+
+        qs = Movie.objects.annotate(total_comments=(
+            Coalesce(Subquery(comments, output_field=IntegerField()), 0) +
+            Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+        ))
+        if with_filter:
+            qs = qs.filter(total_comments__gt=0)
 
-        return qs.annotate(total_comments=Count('comment__comment'),
-                           rank=Window(
+        # Ties share a rank, order them by id rather than by query plan
+        return qs.annotate(rank=Window(
                                expression=DenseRank(),
                                order_by=F('total_comments').desc(),
         )
-        ).values('id', 'total_comments', 'rank')
+        ).values('id', 'total_comments', 'rank').order_by('rank', 'id')
 
     def get(self, request, format=None):
         start_date = request.GET.get('start_date')
@@ -184,3 +345,23 @@ class TopRatedMovieView(APIView):
 
         serializer = TopMovieSerializer(qs, many=True)
         return Response(serializer.data)
+
+
+class TrendingMovieView(APIView):
+    def get(self, request, format=None):
+
+        # Validate k and hours
+        try:
+            k = int(request.GET.get('k', 10))
+            hours = int(request.GET.get('hours', 24))
+        except ValueError:
+            k = hours = 0
+        if not 1 <= k <= 100 or not 1 <= hours <= 168:
+            response = {
+                'error': 'k must be between 1 and 100 and hours between 1 '
+                         'and 168'
+            }
+            return Response(response, status.HTTP_400_BAD_REQUEST)
+
+        serializer = TrendingMovieSerializer(top(k, hours), many=True)
+        return Response(serializer.data)
@@ -123,4 +123,59 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.1/howto/static-files/
 
 STATIC_URL = '/static/'
+
+# Django REST framework
+# orjson replaces the stdlib JSON renderer, MessagePack is picked with
+# `Accept: application/msgpack`
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'api.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
 OMDB_API_KEY = os.environ.get('OMDB_API_KEY')
+
+# Keeps tests away from the files under var/
+TEST_RUNNER = 'api.tests.runner.TempFilesRunner'
+
+# Comments partitioning, see api/partitions.py
+# Raw comments older than the retention are rolled up by compact_comments
+
+COMMENT_RETENTION_MONTHS = int(os.environ.get('COMMENT_RETENTION_MONTHS', 12))
+COMMENT_PARTITIONS_AHEAD = 3
+
+# Similar movies feature matrix, memory-mapped by every worker
+
+SIMILARITY_INDEX_PATH = os.environ.get(
+    'SIMILARITY_INDEX_PATH', os.path.join(BASE_DIR, 'var', 'similarity.npy'))
+
+# Poster cache, resized variants are generated for each width
+
+POSTER_CACHE_DIR = os.environ.get(
+    'POSTER_CACHE_DIR', os.path.join(BASE_DIR, 'var', 'posters'))
+POSTER_SIZES = (100, 300, 600)
+# A failed fetch is retried after POSTER_RETRY_SECONDS, doubling with each
+# consecutive failure up to POSTER_RETRY_MAX_SECONDS
+POSTER_RETRY_SECONDS = 60
+POSTER_RETRY_MAX_SECONDS = 24 * 3600
+
+# Trending movies, a comment's weight halves every TRENDING_HALF_LIFE_HOURS
+
+TRENDING_HALF_LIFE_HOURS = 6
+
+# Buffered comment writes, see api/comment_buffer.py
+
+COMMENT_BUFFER_ENABLED = os.environ.get('COMMENT_BUFFER_ENABLED') == 'true'
+COMMENT_BUFFER_DIR = os.environ.get(
+    'COMMENT_BUFFER_DIR', os.path.join(BASE_DIR, 'var', 'comment-buffer'))
+COMMENT_BUFFER_BATCH_SIZE = 500
+COMMENT_BUFFER_FLUSH_SECONDS = 1
@@ -0,0 +1,56 @@
+"""
+API-only settings for production serving
+
+Everything comes from app.settings, minus what a JSON API doesn't use:
+the admin, sessions, messages, CSRF and the browsable API.
+
+Used by gunicorn.conf.py, or set DJANGO_SETTINGS_MODULE=app.settings_api
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from app.settings import *  # noqa: F401,F403
+from app.settings import REST_FRAMEWORK
+
+DEBUG = False
+
+# Without DEBUG, a wildcard would turn off Host header validation
+ALLOWED_HOSTS = [host for host in
+                 os.environ.get('ALLOWED_HOSTS', '').split(',') if host]
+if not ALLOWED_HOSTS:
+    raise ImproperlyConfigured(
+        'Set ALLOWED_HOSTS to the comma separated host names served')
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'rest_framework',
+    'api'
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+ROOT_URLCONF = 'app.urls_api'
+
+TEMPLATES = []
+
+# Keep database connections open between requests
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', 60))
+DATABASES['default']['CONN_MAX_AGE'] = CONN_MAX_AGE  # noqa: F405
+
+# No sessions to authenticate against, every request is anonymous
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+    ],
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_PERMISSION_CLASSES': [],
+    'UNAUTHENTICATED_USER': None,
+}
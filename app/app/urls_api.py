@@ -0,0 +1,6 @@
+"""app URL Configuration for the API-only settings, without the admin"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('', include('api.urls')),
+]
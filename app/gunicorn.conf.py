@@ -0,0 +1,66 @@
+"""
+gunicorn config for production serving
+
+    gunicorn -c gunicorn.conf.py app.wsgi
+
+The app is loaded once in the master and forked, so workers share its
+memory copy-on-write. The master then holds the code for good: HUP
+restarts workers gracefully but they keep running the old code. To
+deploy new code, start a new master and retire the old one:
+
+    kill -USR2 <old master pid>   # new master and workers start
+    kill -WINCH <old master pid>  # old workers finish requests and exit
+    kill -QUIT <old master pid>   # once the new workers are up
+
+With GUNICORN_PRELOAD=false each worker loads the app itself, HUP then
+reloads the code at the cost of one copy of the app per worker.
+"""
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings_api')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Processes scale with cores. Threads cover time spent waiting on the
+# database and OMDb, which doesn't grow with cores, so their count per
+# worker is fixed
+workers = int(os.environ.get('WEB_CONCURRENCY',
+                             multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true') == 'true'
+
+# Recycle workers now and then, jittered so they don't restart together
+max_requests = 1000
+max_requests_jitter = 100
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    """
+    Finishes loading in the master before workers are forked
+    """
+    if not server.cfg.preload_app:
+        # Anything imported here would be inherited, stale, by the
+        # workers HUP forks
+        return
+
+    from django.db import connections
+    from django.urls import get_resolver
+
+    # Import every view now rather than once per worker
+    get_resolver().url_patterns
+
+    # Workers must not share the master's database sockets
+    connections.close_all()
+
+    # Keep the collector from touching, and so copying, preloaded objects
+    gc.freeze()